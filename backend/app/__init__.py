@@ -1,11 +1,22 @@
+import atexit
 import os
-from flask import Flask, send_from_directory, current_app as app_context # Renamed current_app import
+import time
+import importlib
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import quote
+from werkzeug.security import safe_join
+import click
+from flask import Flask, abort, request, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from sqlalchemy.engine import make_url
 from config import Config # Import the Config class
+from app.json_provider import OrjsonProvider
+from app.summary_cache import SerializedSummaryCache
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -13,12 +24,62 @@ migrate = Migrate()
 bcrypt = Bcrypt()
 jwt = JWTManager()
 
-def create_app(config_class=Config):
+# Headers added to every CORS preflight response when all origins are allowed
+STATIC_CORS_PREFLIGHT_HEADERS = MappingProxyType({
+    'Access-Control-Allow-Methods': 'DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT',
+})
+
+def register_wildcard_cors(app, supports_credentials):
+    """
+    Lightweight replacement for Flask-CORS when CORS_ORIGINS is '*'.
+    Mirrors its headers for /api/* (echoing the Origin when credentials are supported)
+    and answers preflight requests with an empty 204 before any view runs.
+    """
+    def is_api_cors_request():
+        return 'Origin' in request.headers and request.path.startswith('/api/')
+
+    @app.before_request
+    def short_circuit_cors_preflight():
+        if request.method == 'OPTIONS' and is_api_cors_request() \
+                and 'Access-Control-Request-Method' in request.headers:
+            return app.response_class(status=204)
+
+    @app.after_request
+    def add_wildcard_cors_headers(response):
+        if not is_api_cors_request():
+            return response
+        if supports_credentials:
+            # Browsers reject '*' for credentialed requests, so reflect the caller's origin
+            response.headers['Access-Control-Allow-Origin'] = request.headers['Origin']
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+            response.vary.add('Origin')
+        else:
+            response.headers['Access-Control-Allow-Origin'] = '*'
+        if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+            response.headers.update(STATIC_CORS_PREFLIGHT_HEADERS)
+            requested_headers = request.headers.get('Access-Control-Request-Headers')
+            if requested_headers:
+                response.headers['Access-Control-Allow-Headers'] = requested_headers
+        return response
+
+# API blueprints as (module path, blueprint attribute), all registered under /api
+BLUEPRINTS = [
+    ('app.routes.auth_routes', 'auth_bp'),
+    ('app.routes.product_routes', 'product_bp'),
+    ('app.routes.cart_routes', 'cart_bp'),
+    ('app.routes.purchase_routes', 'purchase_bp'),
+    ('app.routes.wishlist_routes', 'wishlist_bp'),
+]
+
+def create_app(config_class=Config, blueprints=None):
     """
     Factory function to create and configure the Flask application.
+    `blueprints` optionally limits registration to the given blueprint names
+    (e.g. ['auth_bp'] in tests); by default all of BLUEPRINTS are registered.
     """
     app = Flask(__name__, instance_relative_config=True) # instance_relative_config=True is good
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app) # orjson-backed jsonify()/get_json()
 
     # Ensure the instance folder exists (for SQLite DB, uploads, etc.)
     # app.instance_path is already an absolute path to the instance folder
@@ -27,22 +88,51 @@ def create_app(config_class=Config):
     except OSError as e:
         app.logger.error(f"Error creating instance folder '{app.instance_path}': {e}")
 
-    # Ensure the upload folder exists using the absolute path from config
+    # Ensure the upload folder exists using the absolute path from config.
+    # Relative paths are resolved once here so saving, deleting and serving all agree.
     upload_folder_abs = app.config.get('UPLOAD_FOLDER')
     if upload_folder_abs:
+        upload_folder_abs = os.path.abspath(upload_folder_abs)
+        app.config['UPLOAD_FOLDER'] = upload_folder_abs
         try:
             os.makedirs(upload_folder_abs, exist_ok=True)
             app.logger.info(f"Upload folder is set to: {upload_folder_abs}")
+            if os.unlink in os.supports_dir_fd:
+                # Kept open for the app's lifetime; image deletes unlink relative to it (see product_routes)
+                app.extensions['upload_dir_fd'] = os.open(upload_folder_abs, os.O_RDONLY | os.O_DIRECTORY)
         except OSError as e:
             app.logger.error(f"Error creating upload folder '{upload_folder_abs}': {e}")
     else:
         app.logger.warning("UPLOAD_FOLDER is not configured in app config.")
 
+    # Normalized once so upload handlers can do a plain O(1) membership test per file
+    app.config['ALLOWED_EXTENSIONS'] = frozenset(ext.lower() for ext in app.config.get('ALLOWED_EXTENSIONS', ()))
+
+
+    # Pool sizing only applies to QueuePool-backed servers; SQLite engines keep SQLAlchemy's default pool
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': app.config.get('DB_POOL_SIZE', 20),
+            'max_overflow': app.config.get('DB_MAX_OVERFLOW', 20),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        }
 
     # Initialize Flask extensions with the app
     db.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
+    bcrypt_pool_workers = app.config.get('BCRYPT_POOL_WORKERS', 0)
+    if bcrypt_pool_workers > 0:
+        # Worker processes are spawned lazily on first submit (see app.password_hashing)
+        app.extensions['bcrypt_pool'] = ProcessPoolExecutor(max_workers=bcrypt_pool_workers)
+    # Single worker that deletes replaced/removed product images after the response (see product_routes);
+    # drained at exit so queued deletes aren't lost
+    upload_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-cleanup')
+    atexit.register(upload_cleanup_executor.shutdown, wait=True)
+    app.extensions['upload_cleanup_executor'] = upload_cleanup_executor
+    product_summary_cache_size = app.config.get('PRODUCT_SUMMARY_CACHE_SIZE', 0)
+    if product_summary_cache_size > 0:
+        app.extensions['product_summary_cache'] = SerializedSummaryCache(product_summary_cache_size)
     jwt.init_app(app)
 
     # Configure CORS
@@ -56,48 +146,70 @@ def create_app(config_class=Config):
     elif isinstance(cors_origins_config, list): # If it's already a list
         origins_list = cors_origins_config
     
-    CORS(app, 
-         resources={r"/api/*": {"origins": origins_list}}, 
-         supports_credentials=app.config.get('CORS_SUPPORTS_CREDENTIALS', True)
-    )
+    supports_credentials = app.config.get('CORS_SUPPORTS_CREDENTIALS', True)
+    if origins_list != "*":
+        CORS(app, 
+             resources={r"/api/*": {"origins": origins_list}}, 
+             supports_credentials=supports_credentials
+        )
+    else:
+        # Allow-all needs no per-origin matching, so skip Flask-CORS's per-response work
+        register_wildcard_cors(app, supports_credentials)
     app.logger.info(f"CORS configured for API origins: {origins_list}")
 
 
-    # Import and register blueprints for different parts of the API
-    from app.routes.auth_routes import auth_bp
-    from app.routes.product_routes import product_bp
-    from app.routes.cart_routes import cart_bp
-    from app.routes.purchase_routes import purchase_bp
-    from app.routes.wishlist_routes import wishlist_bp 
-
-    app.register_blueprint(auth_bp, url_prefix='/api')
-    app.register_blueprint(product_bp, url_prefix='/api')
-    app.register_blueprint(cart_bp, url_prefix='/api')
-    app.register_blueprint(purchase_bp, url_prefix='/api')
-    app.register_blueprint(wishlist_bp, url_prefix='/api')
+    # Import and register blueprints for different parts of the API.
+    # Route modules are only imported for the blueprints actually requested.
+    for module_name, blueprint_name in BLUEPRINTS:
+        if blueprints is not None and blueprint_name not in blueprints:
+            continue
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name), url_prefix='/api')
 
     # Route to serve uploaded files
     # The URL path comes from config: FLASK_STATIC_UPLOADS_URL
     uploads_url_path_segment = app.config.get('FLASK_STATIC_UPLOADS_URL', '/uploads').strip('/')
     
+    # Config is fixed after startup, so resolve everything the file route needs once
+    accel_prefix = (app.config.get('UPLOADS_X_ACCEL_REDIRECT_PREFIX') or '').rstrip('/')
+    uploads_max_age = app.config.get('UPLOADS_MAX_AGE')
+
     # This route must be defined within the create_app context
     @app.route(f'/{uploads_url_path_segment}/<path:filename>')
     def uploaded_file_route(filename): # Renamed to avoid conflict
-        # Use app_context.config here as 'app' might not be the final app object in some contexts
-        upload_dir = app_context.config.get('UPLOAD_FOLDER')
-        
-        if not upload_dir:
-            app_context.logger.error("UPLOAD_FOLDER is not configured for serving files.")
+        if not upload_folder_abs:
+            app.logger.error("UPLOAD_FOLDER is not configured for serving files.")
             return "File serving misconfigured", 500
-        
-        # Ensure upload_dir is absolute for security and correctness with send_from_directory
-        if not os.path.isabs(upload_dir):
-             # This case should ideally be handled by Config making UPLOAD_FOLDER absolute
-            app_context.logger.warning(f"UPLOAD_FOLDER '{upload_dir}' was not absolute. Resolving relative to app.root_path.")
-            upload_dir = os.path.join(app_context.root_path, upload_dir)
-            
-        app_context.logger.debug(f"Attempting to serve file: {filename} from directory: {upload_dir}")
-        return send_from_directory(upload_dir, filename)
+
+        if app.debug:
+            app.logger.debug(f"Attempting to serve file: {filename} from directory: {upload_folder_abs}")
+
+        if accel_prefix:
+            # nginx serves the bytes from its internal location; only validate the path here
+            if safe_join(upload_folder_abs, filename) is None:
+                abort(404)
+            response = app.response_class()
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix}/{quote(filename)}"
+            return response
+
+        # With USE_X_SENDFILE enabled, send_from_directory emits an X-Sendfile header instead of the body
+        return send_from_directory(upload_folder_abs, filename, max_age=uploads_max_age)
+
+    @app.cli.command('bench-bcrypt')
+    def bench_bcrypt():
+        """Prints bcrypt hashing time per cost factor to help choose BCRYPT_LOG_ROUNDS."""
+        for rounds in range(10, 15):
+            start = time.perf_counter()
+            bcrypt.generate_password_hash('benchmark-password', rounds)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            click.echo(f"cost {rounds}: {elapsed_ms:.1f} ms")
+        click.echo(f"Current BCRYPT_LOG_ROUNDS: {app.config.get('BCRYPT_LOG_ROUNDS')}")
+
+    if app.debug:
+        # Development-only view of connection pool usage (checked out / overflow / idle)
+        @app.route('/debug/pool-status')
+        def pool_status():
+            return {"pool": db.engine.pool.status()}
 
     @app.route('/')
     def index():
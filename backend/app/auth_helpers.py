@@ -0,0 +1,50 @@
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+from app import db, jwt
+from app.models import User
+
+@jwt.token_verification_loader
+def identity_is_user_id(jwt_header, jwt_data):
+    """
+    Accepts only tokens whose identity ('sub', a string as JWT requires) is a user id,
+    so protected handlers can use get_current_user_id() without their own int() checks.
+    """
+    return str(jwt_data.get('sub', '')).isdigit()
+
+@jwt.token_verification_failed_loader
+def invalid_identity_response(jwt_header, jwt_data):
+    return jsonify({"msg": "Invalid user identity in token"}), 401
+
+def get_current_user_id():
+    """
+    Returns the current request's JWT identity as an int user id (converted once per request).
+    Doesn't query the database; use get_current_user() when the User row itself is needed.
+    """
+    if '_current_user_id' not in g:
+        g._current_user_id = int(get_jwt_identity())
+    return g._current_user_id
+
+def current_user_exists():
+    """
+    Returns whether the current request's JWT identity still has a User row (a token can outlive its user).
+    Handlers that insert rows referencing the user check this first, since SQLite doesn't enforce the
+    foreign keys. Selects only the id; the result is cached on flask.g.
+    """
+    if '_current_user_exists' not in g:
+        if '_current_user' in g:
+            g._current_user_exists = g._current_user is not None
+        else:
+            g._current_user_exists = db.session.scalar(
+                select(User.id).where(User.id == get_current_user_id())
+            ) is not None
+    return g._current_user_exists
+
+def get_current_user():
+    """
+    Returns the User for the current request's JWT identity, or None if the user no longer exists.
+    The lookup runs at most once per request; the result is cached on flask.g.
+    """
+    if '_current_user' not in g:
+        g._current_user = db.session.get(User, get_current_user_id())
+    return g._current_user
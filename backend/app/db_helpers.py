@@ -0,0 +1,16 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+# Dialects whose insert() construct supports ON CONFLICT DO UPDATE / DO NOTHING
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+def upsert_insert(entity):
+    """
+    Returns a dialect-specific INSERT for `entity` (model or table) that supports
+    ON CONFLICT clauses, or None if the current database has no such construct.
+    """
+    insert_fn = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    return insert_fn(entity) if insert_fn else None
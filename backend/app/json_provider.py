@@ -0,0 +1,22 @@
+import orjson
+from flask.json.provider import JSONProvider
+
+# Naive datetimes from the DB are stored in UTC, so tag them as such when serialized
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, used by jsonify() and request.get_json().
+    Datetimes are serialized natively as ISO 8601 strings.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=ORJSON_OPTIONS), mimetype="application/json")
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
-from app import db, bcrypt
-import json
+from app import db
+from app.password_hashing import hash_password, verify_password
+import orjson # Image filename lists are (de)serialized on every product to_dict()
 from flask import current_app, url_for # For generating full URLs
 
 # Association table for User Wishlist
@@ -24,10 +25,10 @@ class User(db.Model):
                                backref=db.backref('wished_by_users', lazy=True))
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def get_profile_image_url(self):
         if self.profile_image:
@@ -49,12 +50,19 @@ class User(db.Model):
             'email': self.email,
             'username': self.username,
             'profileImage': self.get_profile_image_url(), # Use helper
-            'createdAt': self.created_at.isoformat() if self.created_at else None
+            'createdAt': self.created_at
         }
     def __repr__(self):
         return f"<User {self.username}>"
 
 class Product(db.Model):
+    # Backs get_products' "newest first" listing, optionally narrowed to a category
+    __table_args__ = (
+        db.Index('ix_product_created_at_category', 'created_at', 'category'),
+    )
+
+    SUMMARY_DESCRIPTION_LENGTH = 200 # Characters of description sent to list views (cards clamp it to two lines)
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
@@ -63,42 +71,66 @@ class Product(db.Model):
     _image_filenames = db.Column(db.Text, nullable=True, name='image_filenames') 
     seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Set on insert and bumped on every ORM update; part of the GET /products summary cache key.
+    # NULL only for rows that predate migration cd3d4a71de44 (until their next update), so don't read NULL as "never edited".
+    updated_at = db.Column(db.DateTime, nullable=True, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
 
-    @property
-    def image_filenames_list(self): # Renamed to avoid conflict with images property
-        if self._image_filenames:
+    cart_associations = db.relationship('CartItem', back_populates='product', lazy=True)
+    # Populated only by queries that load it via with_expression(), e.g. get_products
+    description_excerpt = db.query_expression()
+
+    def _memoized_from_filenames(self, key, compute):
+        """
+        Memoizes a value derived from the raw image_filenames column on this instance.
+        The cache is keyed on the raw column value, so assigning new filenames invalidates it.
+        """
+        raw = self._image_filenames
+        cache = self.__dict__.setdefault('_image_filenames_cache', {})
+        cached = cache.get(key)
+        if cached is None or cached[0] != raw:
+            cached = (raw, compute(raw))
+            cache[key] = cached
+        return cached[1]
+
+    @staticmethod
+    def _parse_image_filenames(raw):
+        if raw:
             try:
-                return json.loads(self._image_filenames)
-            except json.JSONDecodeError:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
                 return []
         return []
 
+    @property
+    def image_filenames_list(self): # Renamed to avoid conflict with images property
+        # Return a copy so callers can't mutate the memoized list
+        return list(self._memoized_from_filenames('filenames', self._parse_image_filenames))
+
     @image_filenames_list.setter # Corresponds to image_filenames_list property
     def image_filenames_list(self, filenames_list):
         if isinstance(filenames_list, list) and all(isinstance(fn, str) for fn in filenames_list):
-            self._image_filenames = json.dumps(filenames_list)
+            self._image_filenames = orjson.dumps(filenames_list).decode('utf-8')
         else:
-            self._image_filenames = json.dumps([])
+            self._image_filenames = '[]'
             current_app.logger.warning(f"Invalid type for product image filenames: {filenames_list}. Expected list of strings.")
 
     @property
     def images(self): # This property will return full URLs
-        """Constructs full URLs for product images."""
+        """Constructs full URLs for product images (memoized until the filenames change)."""
+        return list(self._memoized_from_filenames('urls', self._build_image_urls))
+
+    def _build_image_urls(self, raw):
         urls = []
-        if self._image_filenames:
-            try:
-                filenames = json.loads(self._image_filenames)
-                for filename in filenames:
-                    if filename.startswith(('http://', 'https://')): # If it's already a full URL (e.g. placeholder)
-                        urls.append(filename)
-                    else:
-                        try: # Construct URL for locally uploaded files
-                            urls.append(url_for('uploaded_file_route', filename=filename, _external=True))
-                        except RuntimeError: # Fallback if outside app context
-                            uploads_path = current_app.config.get('FLASK_STATIC_UPLOADS_URL', '/uploads').strip('/')
-                            urls.append(f"/{uploads_path}/{filename}")
-            except json.JSONDecodeError:
-                pass
+        for filename in self._memoized_from_filenames('filenames', self._parse_image_filenames):
+            if filename.startswith(('http://', 'https://')): # If it's already a full URL (e.g. placeholder)
+                urls.append(filename)
+            else:
+                try: # Construct URL for locally uploaded files
+                    urls.append(url_for('uploaded_file_route', filename=filename, _external=True))
+                except RuntimeError: # Fallback if outside app context
+                    uploads_path = current_app.config.get('FLASK_STATIC_UPLOADS_URL', '/uploads').strip('/')
+                    urls.append(f"/{uploads_path}/{filename}")
         return urls
 
     def to_dict(self):
@@ -111,18 +143,44 @@ class Product(db.Model):
             'images': self.images, # Uses the property that returns full URLs
             'sellerId': self.seller_id,
             'sellerName': self.seller.username if self.seller else "Unknown Seller",
-            'createdAt': self.created_at.isoformat() if self.created_at else None
+            'createdAt': self.created_at
+        }
+
+    def to_dict_summary(self):
+        """
+        Lighter variant of to_dict() for list views: only the thumbnail image URL and the
+        description excerpt loaded with the row (falls back to truncating the full description).
+        Not a complete product; clients fetch GET /products/<id> for that (e.g. to edit it).
+        """
+        description = self.description_excerpt
+        if description is None:
+            description = self.description[:self.SUMMARY_DESCRIPTION_LENGTH]
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': description,
+            'category': self.category,
+            'price': self.price,
+            'images': self.images[:1], # Thumbnail only
+            'sellerId': self.seller_id,
+            'sellerName': self.seller.username if self.seller else "Unknown Seller",
+            'createdAt': self.created_at
         }
     def __repr__(self):
         return f"<Product {self.title}>"
 
 class CartItem(db.Model):
+    # One row per (user, product); also backs the ON CONFLICT upsert in add_to_cart
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='uq_cartitem_user_product'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     added_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
-    product = db.relationship('Product', backref=db.backref('cart_associations', lazy=True))
+    product = db.relationship('Product', back_populates='cart_associations')
 
     def to_dict(self):
         return {
@@ -130,7 +188,7 @@ class CartItem(db.Model):
             'productId': self.product_id,
             'quantity': self.quantity,
             'product': self.product.to_dict() if self.product else None,
-            'addedAt': self.added_at.isoformat() if self.added_at else None
+            'addedAt': self.added_at
         }
     def __repr__(self):
         return f"<CartItem user_id={self.user_id} product_id={self.product_id} quantity={self.quantity}>"
@@ -142,14 +200,16 @@ class Purchase(db.Model):
     total_amount = db.Column(db.Float, nullable=False)
     items = db.relationship('PurchaseItem', backref='purchase', lazy=True, cascade="all, delete-orphan")
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_items=True):
+        data = {
             'id': self.id,
             'userId': self.user_id,
-            'purchaseDate': self.purchase_date.isoformat() if self.purchase_date else None,
-            'totalAmount': self.total_amount,
-            'items': [item.to_dict() for item in self.items]
+            'purchaseDate': self.purchase_date,
+            'totalAmount': self.total_amount
         }
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+        return data
     def __repr__(self):
         return f"<Purchase id={self.id} user_id={self.user_id} total={self.total_amount}>"
 
@@ -193,13 +253,13 @@ class PurchaseItem(db.Model):
             'images': [self.product_image_url] if self.product_image_url else [],
             'sellerId': self.original_product.seller_id if self.original_product else None,
             'sellerName': self.original_product.seller.username if self.original_product and self.original_product.seller else "N/A",
-            'createdAt': self.original_product.created_at.isoformat() if self.original_product and self.original_product.created_at else None
+            'createdAt': self.original_product.created_at if self.original_product else None
         }
         return {
             'id': self.id,
             'productId': self.product_id,
             'product': product_snapshot,
-            'purchaseDate': self.purchase.purchase_date.isoformat() if self.purchase and self.purchase.purchase_date else None,
+            'purchaseDate': self.purchase.purchase_date if self.purchase else None,
             'quantity': self.quantity
         }
     def __repr__(self):
@@ -0,0 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from flask import current_app
+from app import bcrypt
+
+_bcrypt_pool_replace_lock = Lock()
+
+def _replace_broken_bcrypt_pool(broken_pool):
+    """Swaps a broken bcrypt pool for a fresh one (once, even if several threads saw it break)."""
+    with _bcrypt_pool_replace_lock:
+        if current_app.extensions.get('bcrypt_pool') is broken_pool:
+            current_app.extensions['bcrypt_pool'] = ProcessPoolExecutor(
+                max_workers=current_app.config['BCRYPT_POOL_WORKERS']
+            )
+    broken_pool.shutdown(wait=False)
+
+def _run_bcrypt(func, *args):
+    """
+    Runs a bcrypt call in the app's worker pool when one is configured, else inline.
+    A pool whose worker died is permanently broken, so it is replaced for later calls
+    and this call falls back to running inline.
+    """
+    pool = current_app.extensions.get('bcrypt_pool')
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        current_app.logger.warning("bcrypt worker pool is broken; replacing it and hashing inline")
+        _replace_broken_bcrypt_pool(pool)
+        return func(*args)
+
+def hash_password(password):
+    """
+    Hashes `password` with Flask-Bcrypt and returns the hash as a string.
+    When a bcrypt pool is configured, the work runs in a worker process so the
+    CPU-heavy hash doesn't hold this worker's GIL.
+    """
+    return _run_bcrypt(bcrypt.generate_password_hash, password).decode('utf-8')
+
+def verify_password(pw_hash, password):
+    """Checks `password` against a stored bcrypt hash, using the bcrypt pool when configured."""
+    return _run_bcrypt(bcrypt.check_password_hash, pw_hash, password)
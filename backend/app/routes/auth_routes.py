@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import db, bcrypt
 from app.models import User
+from app.auth_helpers import get_current_user
+from app.schemas import schema_error_response, validate_register_body, validate_login_body, validate_profile_body
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, create_refresh_token
 from datetime import timedelta
 
@@ -12,23 +14,19 @@ def register():
     if not data:
         return jsonify({"msg": "Request body is missing or not JSON"}), 400
 
-    email = data.get('email')
-    username = data.get('username')
-    password = data.get('password')
-    profile_image_url = data.get('profileImage') # Frontend might send a URL or nothing
-
-    if not email or not username or not password:
-        return jsonify({"msg": "Email, username, and password are required"}), 400
+    # Required fields, types, email format and password length (>= 6)
+    error_response = schema_error_response(validate_register_body, data)
+    if error_response:
+        return error_response
 
-    if not isinstance(email, str) or not isinstance(username, str) or not isinstance(password, str):
-        return jsonify({"msg": "Invalid data types for email, username, or password"}), 400
-    
-    if len(password) < 6:
-        return jsonify({"msg": "Password must be at least 6 characters long"}), 400
+    email = data['email']
+    username = data['username']
+    password = data['password']
+    profile_image_url = data.get('profileImage') # Frontend might send a URL or nothing
 
-    if User.query.filter_by(email=email).first():
+    if db.session.query(db.exists().where(User.email == email)).scalar():
         return jsonify({"msg": "Email already exists"}), 409
-    if User.query.filter_by(username=username).first():
+    if db.session.query(db.exists().where(User.username == username)).scalar():
         return jsonify({"msg": "Username already exists"}), 409
 
     # For profile_image, if it's a URL, store it. If it's meant to be an upload, that's handled separately.
@@ -59,12 +57,13 @@ def login():
     data = request.get_json()
     if not data:
         return jsonify({"msg": "Request body is missing or not JSON"}), 400
-        
-    email = data.get('email')
-    password = data.get('password')
 
-    if not email or not password:
-        return jsonify({"msg": "Email and password are required"}), 400
+    error_response = schema_error_response(validate_login_body, data)
+    if error_response:
+        return error_response
+
+    email = data['email']
+    password = data['password']
 
     user = User.query.filter_by(email=email).first()
 
@@ -97,48 +96,40 @@ def logout():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_me():
-    current_user_identity_str = get_jwt_identity()
-    try:
-        user_id = int(current_user_identity_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"msg": "User not found for token identity"}), 404
-    return jsonify(user.to_dict()), 200
+    # ETag over the body lets polling clients revalidate with If-None-Match and get a bodyless 304
+    response = jsonify(user.to_dict())
+    response.add_etag()
+    return response.make_conditional(request)
 
 @auth_bp.route('/profile', methods=['PUT'])
 @jwt_required()
 def update_profile():
-    current_user_identity_str = get_jwt_identity()
-    try:
-        user_id = int(current_user_identity_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-
-    user = User.query.get(user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"msg": "User not found"}), 404
 
     data = request.get_json() # Profile updates are expected as JSON for now
     if not data:
         return jsonify({"msg": "Request body is missing or not JSON"}), 400
+
+    # username must be a non-blank string, profileImage a string or null
+    error_response = schema_error_response(validate_profile_body, data)
+    if error_response:
+        return error_response
     
     # Handle username update
     if 'username' in data:
         new_username = data['username']
-        if not isinstance(new_username, str) or not new_username.strip():
-            return jsonify({"msg": "Username cannot be empty"}), 400
-        if new_username != user.username and User.query.filter_by(username=new_username).first():
+        if new_username != user.username and db.session.query(db.exists().where(User.username == new_username)).scalar():
             return jsonify({"msg": "Username already taken"}), 409
         user.username = new_username.strip()
     
     # Handle profileImage update (assuming it's a URL string from frontend for now)
     # If direct profile image upload is needed, this route would need to handle multipart/form-data
     if 'profileImage' in data:
-        if data['profileImage'] is not None and not isinstance(data['profileImage'], str):
-             return jsonify({"msg": "Invalid profile image URL format"}), 400
         user.profile_image = data['profileImage'] # Store as is (filename or URL)
             
     try:
@@ -1,11 +1,71 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app import db
-from app.models import CartItem, Product, User, Purchase, PurchaseItem # Ensure all are imported
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import CartItem, Product, Purchase, PurchaseItem
+from app.db_helpers import upsert_insert
+from app.json_provider import ORJSON_OPTIONS
+from app.schemas import schema_error_response, validate_cart_add_body, validate_cart_update_body
+from app.auth_helpers import current_user_exists, get_current_user_id
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, timezone
+import orjson
 
 cart_bp = Blueprint('cart_bp', __name__)
 
+CHECKOUT_ITEMS_BATCH_SIZE = 100 # Purchase items loaded and serialized per query in the checkout response
+
+def get_user_cart_items(user_id):
+    """
+    Returns all cart items for a user with their products (and sellers) eager-loaded,
+    so serializing or checking out the cart doesn't issue one SELECT per row.
+    """
+    stmt = (
+        select(CartItem)
+        .options(selectinload(CartItem.product).selectinload(Product.seller))
+        .where(CartItem.user_id == user_id)
+    )
+    return db.session.scalars(stmt).all()
+
+def serialize_purchase_items_batch(purchase_id, after_item_id=0):
+    """
+    Loads the next CHECKOUT_ITEMS_BATCH_SIZE items of a purchase with ids above `after_item_id`
+    (products and sellers eager-loaded) and returns (their serialized JSON, the last item id).
+    """
+    items_stmt = (
+        select(PurchaseItem)
+        .options(selectinload(PurchaseItem.original_product).selectinload(Product.seller))
+        .where(PurchaseItem.purchase_id == purchase_id, PurchaseItem.id > after_item_id)
+        .order_by(PurchaseItem.id)
+        .limit(CHECKOUT_ITEMS_BATCH_SIZE)
+    )
+    items = db.session.scalars(items_stmt).all()
+    serialized = [orjson.dumps(item.to_dict(), option=ORJSON_OPTIONS) for item in items]
+    return serialized, items[-1].id if items else after_item_id
+
+def stream_checkout_response(purchase_id, purchase_details, first_batch):
+    """
+    Yields the checkout response body in chunks, one batch of purchase items at a time,
+    so a large purchase is never materialized as a single JSON document.
+    `first_batch` is loaded by the view, so the common single-batch case can't fail mid-stream.
+    Runs after the view returns (on a fresh session), so it takes plain values, not ORM objects.
+    """
+    yield b'{"msg":"Checkout successful!","purchaseId":%d,"purchaseDetails":' % purchase_id
+    # Re-open the purchase object to append its items array
+    yield orjson.dumps(purchase_details, option=ORJSON_OPTIONS)[:-1] + b',"items":['
+    batch, last_item_id = first_batch
+    yield b','.join(batch)
+    try:
+        while len(batch) == CHECKOUT_ITEMS_BATCH_SIZE:
+            batch, last_item_id = serialize_purchase_items_batch(purchase_id, last_item_id)
+            if batch:
+                yield b',' + b','.join(batch)
+    except Exception as e:
+        # The 200 status is already sent, so the body can only be cut short; the purchase itself is committed
+        current_app.logger.error(f"Error streaming items of purchase {purchase_id} after checkout: {str(e)}")
+        return
+    yield b']}}'
+
 @cart_bp.route('/cart', methods=['GET'])
 @jwt_required()
 def get_cart_items():
@@ -13,17 +73,9 @@ def get_cart_items():
     Gets all items in the current user's shopping cart.
     Requires authentication.
     """
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(current_user_id_int)
-    if not user: 
-        return jsonify({"msg":"Authenticated user not found"}), 404 # Should be rare if token is valid
-    
-    cart_items_query = CartItem.query.filter_by(user_id=current_user_id_int).all()
+    current_user_id_int = get_current_user_id()
+
+    cart_items_query = get_user_cart_items(current_user_id_int)
     return jsonify([item.to_dict() for item in cart_items_query]), 200
 
 @cart_bp.route('/cart', methods=['POST'])
@@ -34,65 +86,70 @@ def add_to_cart():
     Requires authentication.
     Expects 'productId' (number) and optionally 'quantity' (number) in JSON body.
     """
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-
-    user = User.query.get(current_user_id_int)
-    if not user: 
-        return jsonify({"msg":"Authenticated user not found"}), 404
+    current_user_id_int = get_current_user_id()
+    if not current_user_exists():
+        return jsonify({"msg": "Authenticated user not found"}), 404
 
     data = request.get_json()
     if not data:
         return jsonify({"msg": "Request body is missing or not JSON"}), 400
 
-    product_id = data.get('productId') # Frontend sends this as number (Product.id)
-    quantity_req = data.get('quantity', 1) # Default to 1
+    # productId is a required integer (Product.id), quantity an optional integer >= 1
+    error_response = schema_error_response(validate_cart_add_body, data)
+    if error_response:
+        return error_response
 
-    if product_id is None: # Check for None explicitly
-        return jsonify({"msg": "productId is required"}), 400
-    
-    try:
-        # Ensure product_id is an int for DB query
-        product_id = int(product_id) 
-        quantity = int(quantity_req)
-        if quantity < 1:
-            return jsonify({"msg": "Quantity must be at least 1"}), 400
-    except (ValueError, TypeError):
-        return jsonify({"msg": "Invalid productId or quantity format. Must be integers."}), 400
-
-    product = Product.query.get(product_id)
-    if not product:
+    # int() normalizes integral floats such as 2.0, which JSON Schema also accepts as integers
+    product_id = int(data['productId'])
+    quantity = int(data.get('quantity', 1)) # Default to 1
+
+    # Existence and ownership only need (id, seller_id), not a full Product row
+    product_row = db.session.execute(
+        select(Product.id, Product.seller_id).where(Product.id == product_id)
+    ).first()
+    if not product_row:
         return jsonify({"msg": "Product not found"}), 404
     
-    if product.seller_id == current_user_id_int:
+    if product_row.seller_id == current_user_id_int:
         return jsonify({"msg": "You cannot add your own product to the cart"}), 403
 
-    cart_item = CartItem.query.filter_by(user_id=current_user_id_int, product_id=product_id).first()
-
-    if cart_item:
-        cart_item.quantity += quantity
-    else:
-        cart_item = CartItem(user_id=current_user_id_int, product_id=product_id, quantity=quantity)
-        db.session.add(cart_item)
-    
     try:
+        upsert_stmt = upsert_insert(CartItem)
+        if upsert_stmt is not None:
+            # One INSERT ... ON CONFLICT DO UPDATE against uq_cartitem_user_product
+            # RETURNING hands back the affected row's id in the same round-trip
+            upsert_stmt = upsert_stmt.values(user_id=current_user_id_int, product_id=product_id, quantity=quantity)
+            cart_item_id = db.session.execute(upsert_stmt.on_conflict_do_update(
+                index_elements=['user_id', 'product_id'],
+                set_={'quantity': CartItem.quantity + upsert_stmt.excluded.quantity}
+            ).returning(CartItem.id)).scalar_one()
+        else:
+            # Dialects without ON CONFLICT fall back to SELECT + UPDATE/INSERT
+            cart_item = CartItem.query.filter_by(user_id=current_user_id_int, product_id=product_id).first()
+            if cart_item:
+                cart_item.quantity += quantity
+            else:
+                cart_item = CartItem(user_id=current_user_id_int, product_id=product_id, quantity=quantity)
+                db.session.add(cart_item)
+            db.session.flush()
+            cart_item_id = cart_item.id
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error adding to cart for user {current_user_id_int}, product {product_id}: {str(e)}")
         return jsonify({"msg": "Failed to add item to cart due to a server error"}), 500
+
+    # Load the item for the response by primary key, joining its product and seller
+    cart_item = db.session.get(
+        CartItem, cart_item_id,
+        options=[joinedload(CartItem.product).joinedload(Product.seller)]
+    )
         
-    # For consistency, refetch the cart to send back the full updated cart state
-    # This helps if multiple operations happen quickly or if totals are complex.
-    # Alternatively, just return the created/updated cart_item.to_dict()
-    updated_cart_items = CartItem.query.filter_by(user_id=current_user_id_int).all()
+    # Only the affected item is returned; clients patch their local cart state
+    # (GET /cart remains available for a full resync).
     return jsonify({
         "msg": "Item added/updated in cart",
-        "item": cart_item.to_dict(), # The specific item affected
-        "cart": [item.to_dict() for item in updated_cart_items] # The full updated cart
+        "item": cart_item.to_dict() # The specific item affected
     }), 200 if cart_item.quantity > quantity else 201
 
 
@@ -103,23 +160,16 @@ def update_cart_item_quantity(product_id_in_cart):
     Updates the quantity of a specific product in the current user's cart.
     product_id_in_cart is Product.id.
     """
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(current_user_id_int)
-    if not user: return jsonify({"msg":"Authenticated user not found"}), 404
+    current_user_id_int = get_current_user_id()
 
     data = request.get_json()
-    if not data or 'quantity' not in data:
+    if not data:
         return jsonify({"msg": "Quantity is required in request body"}), 400
-    
-    try:
-        quantity = int(data['quantity'])
-    except (ValueError, TypeError):
-        return jsonify({"msg": "Invalid quantity format. Must be an integer."}), 400
+
+    error_response = schema_error_response(validate_cart_update_body, data)
+    if error_response:
+        return error_response
+    quantity = int(data['quantity'])
 
     cart_item = CartItem.query.filter_by(user_id=current_user_id_int, product_id=product_id_in_cart).first()
     if not cart_item:
@@ -139,11 +189,9 @@ def update_cart_item_quantity(product_id_in_cart):
         current_app.logger.error(f"Error updating cart item for user {current_user_id_int}, product {product_id_in_cart}: {str(e)}")
         return jsonify({"msg": "Failed to update cart item due to a server error"}), 500
         
-    updated_cart_items = CartItem.query.filter_by(user_id=current_user_id_int).all()
     return jsonify({
         "msg": msg, 
-        "item": cart_item.to_dict() if quantity >= 1 else None, # Send updated item if not deleted
-        "cart": [item.to_dict() for item in updated_cart_items]
+        "item": cart_item.to_dict() if quantity >= 1 else None # Send updated item if not deleted
     }), 200
 
 
@@ -154,14 +202,7 @@ def remove_from_cart(product_id_in_cart):
     Removes a specific product from the current user's cart.
     product_id_in_cart is Product.id.
     """
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(current_user_id_int)
-    if not user: return jsonify({"msg":"Authenticated user not found"}), 404
+    current_user_id_int = get_current_user_id()
 
     cart_item = CartItem.query.filter_by(user_id=current_user_id_int, product_id=product_id_in_cart).first()
     if not cart_item:
@@ -175,47 +216,26 @@ def remove_from_cart(product_id_in_cart):
         current_app.logger.error(f"Error removing from cart for user {current_user_id_int}, product {product_id_in_cart}: {str(e)}")
         return jsonify({"msg": "Failed to remove item from cart due to a server error"}), 500
         
-    updated_cart_items = CartItem.query.filter_by(user_id=current_user_id_int).all()
-    return jsonify({"msg": "Product removed from cart", "cart": [item.to_dict() for item in updated_cart_items]}), 200
+    return jsonify({"msg": "Product removed from cart", "productId": product_id_in_cart}), 200
 
 
 @cart_bp.route('/cart/checkout', methods=['POST'])
 @jwt_required()
 def checkout():
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(current_user_id_int)
-    if not user: return jsonify({"msg":"Authenticated user not found"}), 404
+    current_user_id_int = get_current_user_id()
 
-    cart_items_to_checkout = CartItem.query.filter_by(user_id=current_user_id_int).all()
+    cart_items_to_checkout = get_user_cart_items(current_user_id_int)
     if not cart_items_to_checkout:
         return jsonify({"msg": "Cart is empty. Nothing to checkout."}), 400
 
-    total_amount = 0
-    purchase_items_data_for_db = []
-
     for item in cart_items_to_checkout:
         if not item.product:
             current_app.logger.error(f"Product with ID {item.product_id} in cart for user {current_user_id_int} not found during checkout.")
             return jsonify({"msg": f"Critical error: Product with ID {item.product_id} in cart not found. Checkout aborted."}), 500
-        
-        item_total = item.product.price * item.quantity
-        total_amount += item_total
-        purchase_items_data_for_db.append({
-            'product_id': item.product.id,
-            'quantity': item.quantity,
-            'price_at_purchase': item.product.price,
-            'product_title': item.product.title,
-            'product_image_filename': item.product.image_filenames_list[0] if item.product.image_filenames_list else None
-        })
 
     new_purchase = Purchase(
         user_id=current_user_id_int, 
-        total_amount=round(total_amount, 2), 
+        total_amount=round(sum(item.product.price * item.quantity for item in cart_items_to_checkout), 2), 
         purchase_date=datetime.now(timezone.utc)
     )
     db.session.add(new_purchase)
@@ -223,21 +243,25 @@ def checkout():
     try:
         # Flush to get new_purchase.id before creating PurchaseItems that depend on it
         db.session.flush() 
+        purchase_id = new_purchase.id # Kept as a plain value; commit expires the object
 
-        for pi_data in purchase_items_data_for_db:
-            purchase_item_entry = PurchaseItem(
-                purchase_id=new_purchase.id, 
-                product_id=pi_data['product_id'],
-                quantity=pi_data['quantity'],
-                price_at_purchase=pi_data['price_at_purchase'],
-                product_title=pi_data['product_title'],
-                _product_image_filename=pi_data['product_image_filename'] # Set the raw filename
-            )
-            db.session.add(purchase_item_entry)
-
-        # Delete cart items after they are processed
-        for item in cart_items_to_checkout:
-            db.session.delete(item)
+        # Build the purchase item rows straight from the cart and insert them with one executemany INSERT.
+        # Keys match the table's column names (e.g. 'product_image_filename').
+        purchase_item_rows = [{
+            'purchase_id': purchase_id,
+            'product_id': item.product.id,
+            'quantity': item.quantity,
+            'price_at_purchase': item.product.price,
+            'product_title': item.product.title,
+            'product_image_filename': next(iter(item.product.image_filenames_list), None)
+        } for item in cart_items_to_checkout]
+        db.session.execute(PurchaseItem.__table__.insert(), purchase_item_rows)
+
+        # Remove the checked-out cart rows with a single DELETE; limited to the rows loaded above so
+        # items added by a concurrent POST /cart stay in the cart instead of vanishing unpurchased
+        db.session.execute(
+            CartItem.__table__.delete().where(CartItem.id.in_([item.id for item in cart_items_to_checkout]))
+        )
 
         db.session.commit()
     except Exception as e:
@@ -245,8 +269,15 @@ def checkout():
         current_app.logger.error(f"Error during checkout for user {current_user_id_int}: {str(e)}")
         return jsonify({"msg": "Checkout failed due to a server error"}), 500
         
-    return jsonify({
-        "msg": "Checkout successful!", 
-        "purchaseId": new_purchase.id,
-        "purchaseDetails": new_purchase.to_dict() # Send back the created purchase with full URLs
-    }), 200
+    try:
+        first_items_batch = serialize_purchase_items_batch(purchase_id)
+        purchase_details = new_purchase.to_dict(include_items=False)
+    except Exception as e:
+        current_app.logger.error(f"Error loading purchase {purchase_id} after checkout for user {current_user_id_int}: {str(e)}")
+        return jsonify({
+            "msg": "Checkout completed, but the purchase details could not be loaded",
+            "purchaseId": purchase_id
+        }), 500
+
+    purchase_body = stream_checkout_response(purchase_id, purchase_details, first_items_batch)
+    return Response(stream_with_context(purchase_body), mimetype='application/json')
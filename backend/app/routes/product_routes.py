@@ -1,88 +1,291 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from app import db
 from app.models import Product, User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.auth_helpers import current_user_exists, get_current_user_id
+from app.json_provider import ORJSON_OPTIONS
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, select
+from sqlalchemy.orm import defer, selectinload, with_expression
 import os
-import uuid # For generating unique filenames
+import secrets # For generating unique filenames
 from werkzeug.utils import secure_filename # For sanitizing filenames
-import json # For parsing existingImages from form data
+import orjson # For parsing existingImages from form data and composing list responses
+from werkzeug.exceptions import RequestEntityTooLarge
+from streaming_form_data import StreamingFormDataParser, ParseFailedException
+from streaming_form_data.targets import BaseTarget, ValueTarget
 
 product_bp = Blueprint('product_bp', __name__)
 
-def allowed_file(filename):
-    """Checks if the uploaded file has an allowed extension."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+FORM_STREAM_CHUNK_SIZE = 64 * 1024 # Bytes of request body fed to the multipart parser per call
+UPLOAD_WRITE_BUFFER_SIZE = 1 << 20 # 1 MiB write buffer per uploaded image file
+IMAGE_SNIFF_LENGTH = 12 # Leading bytes needed to recognize every format in sniff_image_type()
+# File extensions each sniffed image type may be stored under
+IMAGE_TYPE_EXTENSIONS = {'png': {'png'}, 'jpeg': {'jpg', 'jpeg'}, 'gif': {'gif'}, 'webp': {'webp'}}
+
+def allowed_file(ext, allowed_extensions):
+    """Checks an uploaded file's (lowercased) extension against the app's ALLOWED_EXTENSIONS frozenset."""
+    return bool(ext) and ext in allowed_extensions
+
+def sniff_image_type(header):
+    """Identifies PNG/JPEG/GIF/WEBP content from its leading magic bytes; returns None for anything else."""
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+class ImageUploadTarget(BaseTarget):
+    """
+    streaming-form-data target for the repeated 'images' field.
+    Each part with an allowed extension is written straight to the upload folder,
+    under a new unique filename, as its bytes arrive; other parts are skipped.
+    The file is only created once the part's first bytes match an image of that extension,
+    so junk content never reaches the disk.
+    Parts arrive one after another on the request stream, so every file is already
+    complete by the time the next starts; batching their writes (io_uring etc.) has nothing to overlap.
+    """
+
+    def __init__(self, upload_folder, allowed_extensions, max_file_size=None, max_parts=None):
+        super().__init__()
+        self.upload_folder = upload_folder
+        self.allowed_extensions = allowed_extensions
+        self.max_file_size = max_file_size
+        self.max_parts = max_parts
+        self.saved_filenames = []
+        self._file = None
+        self._filename = None
+        self._ext = None
+        self._header = None # Leading bytes of the current part, buffered until they can be sniffed
+        self._file_size = 0
+        self._part_count = 0
+
+    def on_start(self):
+        self.close() # The parser doesn't always call finish() before the next part starts
+        self._part_count += 1
+        self._file_size = 0
+        if self.max_parts is not None and self._part_count > self.max_parts:
+            raise RequestEntityTooLarge(f"Too many image files (limit {self.max_parts})")
+        if not self.multipart_filename:
+            current_app.logger.warning("Received a file part without a filename.")
+            return
+        # Extension computed once; the stored name is random, so only the (allow-listed) extension is kept
+        ext = self.multipart_filename.rpartition('.')[2].lower() if '.' in self.multipart_filename else ''
+        if not allowed_file(ext, self.allowed_extensions):
+            current_app.logger.warning(f"File type not allowed or no filename: {self.multipart_filename}")
+            return
+        if not self.upload_folder: # create_app() makes sure a configured folder exists
+            current_app.logger.error("UPLOAD_FOLDER is not configured in app config.")
+            return
+
+        self._ext = ext
+        self._header = b''
+
+    def on_data_received(self, chunk):
+        if self._file is None and self._header is None:
+            return # Part is being skipped
+        self._file_size += len(chunk)
+        if self.max_file_size is not None and self._file_size > self.max_file_size:
+            raise RequestEntityTooLarge(f"Image file exceeds the {self.max_file_size} byte limit")
+        if self._file is None:
+            self._header += chunk
+            if len(self._header) >= IMAGE_SNIFF_LENGTH:
+                self._open_if_image()
+        else:
+            self._file.write(chunk)
+
+    def _open_if_image(self):
+        """Checks the buffered leading bytes and, if they match the extension, creates the file with them."""
+        header, self._header = self._header, None
+        image_type = sniff_image_type(header)
+        if image_type is None or self._ext not in IMAGE_TYPE_EXTENSIONS[image_type]:
+            current_app.logger.warning(f"File content is not a valid {self._ext} image: {self.multipart_filename}")
+            return
+
+        self._filename = f"{secrets.token_hex(16)}.{self._ext}"
+        # The 1 MiB buffer coalesces the parser's small chunks into few large write() calls
+        self._file = open(os.path.join(self.upload_folder, self._filename), 'wb', buffering=UPLOAD_WRITE_BUFFER_SIZE)
+        self._file.write(header)
+
+    def on_finish(self):
+        self.close()
+
+    def close(self):
+        """Finalizes the file currently being written, if any."""
+        if self._header is not None: # Part ended before IMAGE_SNIFF_LENGTH bytes arrived
+            self._open_if_image()
+        if self._file:
+            self._file.flush()
+            if hasattr(os, 'posix_fadvise'):
+                # Images are served back by the static route/nginx later, not re-read now,
+                # so don't leave them occupying the page cache
+                os.posix_fadvise(self._file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            self._file.close()
+            self._file = None
+            self.saved_filenames.append(self._filename)
+            current_app.logger.info(f"Saved file: {self._filename}")
+
+    def discard(self):
+        """Closes and deletes every file this target wrote (e.g. after a parse error)."""
+        self._header = None # Don't create a file from a half-sniffed part
+        self.close()
+        remove_uploaded_files(self.saved_filenames)
+        self.saved_filenames = []
+
+class FormFieldTarget(ValueTarget):
+    """
+    ValueTarget that also records whether the field was present in the body at all,
+    and refuses to buffer more than `max_size` bytes of it.
+    """
+
+    def __init__(self, max_size=None):
+        super().__init__()
+        self.max_size = max_size
+        self.present = False
+        self._size = 0
+
+    def on_start(self):
+        self.present = True
+
+    def on_data_received(self, chunk):
+        self._size += len(chunk)
+        if self.max_size is not None and self._size > self.max_size:
+            raise RequestEntityTooLarge(f"Form field exceeds the {self.max_size} byte limit")
+        super().on_data_received(chunk)
+
+def parse_product_form(field_names):
+    """
+    Parses the multipart request body with streaming-form-data instead of Werkzeug's parser,
+    reading request.stream in FORM_STREAM_CHUNK_SIZE blocks.
+    Returns (fields, saved_filenames): `fields` maps each of `field_names` present in the body
+    to its value; 'images' files have already been written to the upload folder.
+    Raises ParseFailedException for malformed bodies, UnicodeDecodeError for non-UTF-8 fields and
+    RequestEntityTooLarge when a configured limit is exceeded (after removing any files written).
+    """
+    config = current_app.config
+    parser = StreamingFormDataParser(headers=request.headers)
+    field_targets = {name: FormFieldTarget(config.get('MAX_FORM_MEMORY_SIZE')) for name in field_names}
+    for name, target in field_targets.items():
+        parser.register(name, target)
+    image_target = ImageUploadTarget(
+        config.get('UPLOAD_FOLDER'), config['ALLOWED_EXTENSIONS'],
+        config.get('MAX_IMAGE_FILE_SIZE'), config.get('MAX_FORM_PARTS')
+    )
+    parser.register('images', image_target) # Key used by frontend FormData
 
-def save_files_from_request(files_list_from_request):
+    try:
+        while True:
+            chunk = request.stream.read(FORM_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+        image_target.close()
+        fields = {name: target.value.decode('utf-8') for name, target in field_targets.items() if target.present}
+    except Exception:
+        image_target.discard()
+        raise
+
+    return fields, image_target.saved_filenames
+
+def oversized_request_response():
+    """
+    Rejects product form bodies from their Content-Length header alone, before any parsing
+    or file writes. Returns an error response, or None if the body may be read.
+    """
+    max_length = current_app.config.get('MAX_CONTENT_LENGTH')
+    if max_length is None:
+        return None
+    if request.content_length is None:
+        return jsonify({"msg": "Content-Length header is required"}), 411
+    if request.content_length > max_length:
+        return jsonify({"msg": f"Request body exceeds the {max_length} byte limit"}), 413
+    return None
+
+def _unlink_upload(filename, upload_folder, upload_dir_fd):
     """
-    Saves uploaded files from a FileStorage list and returns a list of their new unique filenames.
+    Deletes one file from the upload folder. Returns False if it was already gone.
+    Unlinks relative to the app's cached upload folder fd where the platform supports it,
+    so the folder path isn't resolved again for every file.
     """
-    saved_filenames = []
-    upload_folder = current_app.config.get('UPLOAD_FOLDER')
-
-    if not upload_folder or not os.path.exists(upload_folder):
-        current_app.logger.error(f"Upload folder '{upload_folder}' is not configured or does not exist.")
-        # Depending on requirements, you might raise an error or return empty
-        return [] 
-
-    for file_storage in files_list_from_request:
-        if file_storage and file_storage.filename and allowed_file(file_storage.filename):
-            original_filename = secure_filename(file_storage.filename)
-            ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
-            if not ext: # Should not happen if allowed_file passed, but good check
-                current_app.logger.warning(f"File with no extension skipped: {original_filename}")
-                continue
-            
-            unique_filename = f"{uuid.uuid4().hex}.{ext}"
-            file_path = os.path.join(upload_folder, unique_filename)
-            try:
-                file_storage.save(file_path)
-                saved_filenames.append(unique_filename)
-                current_app.logger.info(f"Saved file: {unique_filename} at {file_path}")
-            except Exception as e:
-                current_app.logger.error(f"Error saving file {original_filename} to {file_path}: {str(e)}")
-        elif file_storage and file_storage.filename: # File was provided but not allowed
-            current_app.logger.warning(f"File type not allowed or no filename: {file_storage.filename}")
-        elif file_storage and not file_storage.filename:
-             current_app.logger.warning(f"Received a file storage object without a filename.")
-
-
-    return saved_filenames
+    try:
+        if upload_dir_fd is not None:
+            os.unlink(filename, dir_fd=upload_dir_fd)
+        else:
+            os.unlink(os.path.join(upload_folder, filename))
+    except FileNotFoundError:
+        return False
+    return True
+
+def _unlink_many(filenames, upload_folder, upload_dir_fd, logger):
+    """Deletes the given files; runs either inline or on the upload cleanup thread (no app context)."""
+    for filename in filenames:
+        try:
+            if _unlink_upload(filename, upload_folder, upload_dir_fd):
+                logger.info(f"Deleted image file: {filename}")
+        except Exception as e:
+            logger.error(f"Error deleting uploaded file {filename}: {str(e)}")
 
+def remove_uploaded_files(filenames, background=False):
+    """
+    Deletes the given files from the upload folder, ignoring ones that are already gone.
+    With background=True the deletes are queued on the app's single upload cleanup thread
+    (when configured) so the response doesn't wait on the disk.
+    """
+    args = (
+        list(filenames), current_app.config.get('UPLOAD_FOLDER'),
+        current_app.extensions.get('upload_dir_fd'), current_app.logger
+    )
+    executor = current_app.extensions.get('upload_cleanup_executor') if background else None
+    if executor is not None:
+        executor.submit(_unlink_many, *args)
+    else:
+        _unlink_many(*args)
 
 @product_bp.route('/products', methods=['POST'])
 @jwt_required()
 def create_product():
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
+    error_response = oversized_request_response()
+    if error_response:
+        return error_response
 
-    user = User.query.get(current_user_id_int)
-    if not user:
-        return jsonify({"msg": "Authenticated user not found"}), 404 
+    current_user_id_int = get_current_user_id()
+    if not current_user_exists():
+        return jsonify({"msg": "Authenticated user not found"}), 404
 
     if 'multipart/form-data' not in request.content_type:
         return jsonify({"msg": "Content-Type must be multipart/form-data"}), 415
 
-    title = request.form.get('title')
-    description = request.form.get('description')
-    category = request.form.get('category')
-    price_str = request.form.get('price')
-    uploaded_files = request.files.getlist('images') # Key used by frontend FormData
+    # Image files are streamed to disk while the body is parsed, so remove them on any validation error
+    try:
+        form_fields, saved_filenames = parse_product_form(('title', 'description', 'category', 'price'))
+    except ParseFailedException:
+        return jsonify({"msg": "Malformed multipart/form-data body"}), 400
+    except UnicodeDecodeError:
+        return jsonify({"msg": "Form fields must be UTF-8"}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({"msg": e.description}), 413
+
+    title = form_fields.get('title')
+    description = form_fields.get('description')
+    category = form_fields.get('category')
+    price_str = form_fields.get('price')
 
     required_fields = {'title': title, 'description': description, 'category': category, 'price': price_str}
     missing_fields = [key for key, value in required_fields.items() if value is None or str(value).strip() == ""]
     if missing_fields:
+        remove_uploaded_files(saved_filenames)
         return jsonify({"msg": f"Missing required product fields: {', '.join(missing_fields)}"}), 400
 
     try:
         price = float(price_str)
         if price <= 0:
+            remove_uploaded_files(saved_filenames)
             return jsonify({"msg": "Price must be a positive number"}), 400
     except (ValueError, TypeError):
+        remove_uploaded_files(saved_filenames)
         return jsonify({"msg": "Invalid price format. Price must be a number."}), 400
 
     new_product = Product(
@@ -93,17 +296,16 @@ def create_product():
         seller_id=current_user_id_int
     )
 
-    saved_filenames = []
-    if uploaded_files:
-        saved_filenames = save_files_from_request(uploaded_files)
-    
     new_product.image_filenames_list = saved_filenames # Use the setter for filenames
 
+    # The files are already on disk when the row is inserted: one INSERT + COMMIT,
+    # and if that fails the files are removed again rather than left orphaned
     try:
         db.session.add(new_product)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
+        remove_uploaded_files(saved_filenames)
         current_app.logger.error(f"Error creating product for user {current_user_id_int}: {str(e)}")
         return jsonify({"msg": "Failed to create product due to a server error"}), 500
         
@@ -112,13 +314,13 @@ def create_product():
 @product_bp.route('/products/<int:product_id>', methods=['PUT'])
 @jwt_required()
 def update_product(product_id):
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
+    error_response = oversized_request_response()
+    if error_response:
+        return error_response
+
+    current_user_id_int = get_current_user_id()
 
-    product = Product.query.get_or_404(product_id, description="Product not found")
+    product = db.get_or_404(Product, product_id, description="Product not found")
 
     if product.seller_id != current_user_id_int:
         return jsonify({"msg": "Not authorized to update this product"}), 403
@@ -126,64 +328,72 @@ def update_product(product_id):
     if 'multipart/form-data' not in request.content_type:
          return jsonify({"msg": "Content-Type must be multipart/form-data for product updates"}), 415
 
-    if 'title' in request.form: product.title = request.form.get('title', product.title).strip()
-    if 'description' in request.form: product.description = request.form.get('description', product.description).strip()
-    if 'category' in request.form: product.category = request.form.get('category', product.category).strip()
+    # New image files are streamed to disk while the body is parsed
+    try:
+        form_fields, newly_saved_filenames = parse_product_form(
+            ('title', 'description', 'category', 'price', 'existingImages')
+        )
+    except ParseFailedException:
+        return jsonify({"msg": "Malformed multipart/form-data body"}), 400
+    except UnicodeDecodeError:
+        return jsonify({"msg": "Form fields must be UTF-8"}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({"msg": e.description}), 413
+
+    if 'title' in form_fields: product.title = form_fields['title'].strip()
+    if 'description' in form_fields: product.description = form_fields['description'].strip()
+    if 'category' in form_fields: product.category = form_fields['category'].strip()
     
-    if 'price' in request.form:
+    if 'price' in form_fields:
         try:
-            price = float(request.form.get('price'))
-            if price <= 0: return jsonify({"msg": "Price must be a positive number"}), 400
+            price = float(form_fields['price'])
+            if price <= 0:
+                remove_uploaded_files(newly_saved_filenames)
+                return jsonify({"msg": "Price must be a positive number"}), 400
             product.price = price
-        except (ValueError, TypeError): return jsonify({"msg": "Invalid price format"}), 400
+        except (ValueError, TypeError):
+            remove_uploaded_files(newly_saved_filenames)
+            return jsonify({"msg": "Invalid price format"}), 400
 
     # Image handling:
     # `existingImages`: JSON string array of full URLs of images to keep. We need to extract filenames.
     # `images`: New files to upload.
     
     final_filenames_to_keep = []
-    existing_images_json_str = request.form.get('existingImages')
+    existing_images_json_str = form_fields.get('existingImages')
     if existing_images_json_str:
         try:
-            existing_image_urls_to_keep = json.loads(existing_images_json_str)
+            existing_image_urls_to_keep = orjson.loads(existing_images_json_str)
             if isinstance(existing_image_urls_to_keep, list):
+                # Read once, not per URL. URLs are absolute (scheme://host/uploads/<name>), so this is
+                # a substring test for "<prefix>/" rather than startswith()
+                uploads_url_marker = (current_app.config.get('FLASK_STATIC_UPLOADS_URL') or '').rstrip('/') + '/'
                 for url_or_filename in existing_image_urls_to_keep:
                     if isinstance(url_or_filename, str):
-                        # If it's a full URL from our server, extract filename
-                        if current_app.config.get('FLASK_STATIC_UPLOADS_URL') in url_or_filename:
-                            final_filenames_to_keep.append(os.path.basename(url_or_filename))
+                        # If it's a full URL from our server, extract filename (last path segment only)
+                        if uploads_url_marker in url_or_filename:
+                            final_filenames_to_keep.append(url_or_filename.rpartition('/')[2])
                         # If it's just a filename already (e.g., from an earlier placeholder or if frontend sends it)
                         elif not url_or_filename.startswith(('http://', 'https://')):
                              final_filenames_to_keep.append(secure_filename(url_or_filename))
                         # else: it's an external URL, we might choose to keep it as is if our model supported mixed types
                         # For now, we assume existingImages are filenames or derive them.
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             current_app.logger.warning(f"Could not parse existingImages JSON: {existing_images_json_str}")
         except Exception as e:
             current_app.logger.error(f"Error processing existingImages for product {product_id}: {str(e)}")
 
 
-    newly_uploaded_files = request.files.getlist('images')
-    newly_saved_filenames = []
-    if newly_uploaded_files:
-        newly_saved_filenames = save_files_from_request(newly_uploaded_files)
-
     # Determine which old files to delete from storage
-    current_db_filenames = product.image_filenames_list
     all_final_filenames = final_filenames_to_keep + newly_saved_filenames
     
-    files_to_delete_from_storage = [fn for fn in current_db_filenames if fn not in all_final_filenames]
-    
-    upload_folder = current_app.config.get('UPLOAD_FOLDER')
-    for filename_to_delete in files_to_delete_from_storage:
-        if filename_to_delete: # Ensure not empty
-            try:
-                file_path = os.path.join(upload_folder, filename_to_delete)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    current_app.logger.info(f"Deleted old image file during update: {filename_to_delete}")
-            except Exception as e:
-                current_app.logger.error(f"Error deleting old image file {filename_to_delete}: {str(e)}")
+    # One pass over the current filenames against a set of the final ones (linear overall);
+    # the unlinks themselves are queued after the commit below
+    final_filenames_set = set(all_final_filenames)
+    files_to_delete_from_storage = [
+        filename for filename in product.image_filenames_list
+        if filename and filename not in final_filenames_set # Ensure not empty
+    ]
 
     product.image_filenames_list = all_final_filenames # Update product with the new list of filenames
     
@@ -191,20 +401,67 @@ def update_product(product_id):
         db.session.commit()
     except Exception as e:
         db.session.rollback()
+        remove_uploaded_files(newly_saved_filenames)
         current_app.logger.error(f"Error updating product {product_id}: {str(e)}")
         return jsonify({"msg": "Failed to update product due to a server error"}), 500
+
+    # Old images are removed once the new list is committed, off the request path
+    remove_uploaded_files(files_to_delete_from_storage, background=True)
         
     return jsonify(product.to_dict()), 200
 
 # --- Other product routes (GET all, GET one, DELETE, GET my-listings) ---
 # These should largely remain the same as the last correct version,
-# ensuring they use int(current_user_id_str) for DB queries where needed.
+# ensuring they use get_current_user_id() for DB queries where needed.
+
+def summary_load_options():
+    """
+    Loader options for list views: they only need a description excerpt and the seller's name,
+    so skip the full description text and load all sellers of the batch in one extra SELECT.
+    """
+    return (
+        defer(Product.description),
+        with_expression(
+            Product.description_excerpt,
+            func.substr(Product.description, 1, Product.SUMMARY_DESCRIPTION_LENGTH)
+        ),
+        selectinload(Product.seller).load_only(User.id, User.username)
+    )
+
+def serialized_product_summaries(page_rows):
+    """
+    Returns the orjson-serialized to_dict_summary() of each (id, updated_at, seller username) row, in order.
+    Summaries come from the app's product summary cache where possible; the misses are loaded
+    with one SELECT and cached. Image URLs are absolute, so the request's URL root is part of the key.
+    """
+    cache = current_app.extensions.get('product_summary_cache')
+    url_root = request.url_root
+    keys = [(row.id, row.updated_at, row.username, url_root) for row in page_rows]
+    serialized = cache.get_many(keys) if cache is not None else {}
+
+    missing_ids = [key[0] for key in keys if key not in serialized]
+    loaded_by_id = {}
+    if missing_ids:
+        loaded = {}
+        for product in db.session.scalars(
+            select(Product).where(Product.id.in_(missing_ids)).options(*summary_load_options())
+        ):
+            # Keyed on the freshly loaded values, in case the row changed since the page query
+            key = (product.id, product.updated_at, product.seller.username if product.seller else None, url_root)
+            loaded[key] = loaded_by_id[product.id] = orjson.dumps(product.to_dict_summary(), option=ORJSON_OPTIONS)
+        if cache is not None:
+            cache.set_many(loaded)
+    # Products deleted since the page query simply drop out
+    summaries = (serialized.get(key) or loaded_by_id.get(key[0]) for key in keys)
+    return [summary for summary in summaries if summary is not None]
 
 @product_bp.route('/products', methods=['GET'])
 def get_products():
     category_filter = request.args.get('category')
     search_query = request.args.get('q') 
-    query = Product.query
+    # The page itself is only (id, updated_at, seller username): enough to identify
+    # cached summaries; full rows are loaded just for the cache misses
+    query = Product.query.outerjoin(Product.seller).with_entities(Product.id, Product.updated_at, User.username)
     if category_filter and category_filter.lower() != 'all':
         query = query.filter(Product.category.ilike(category_filter))
     if search_query:
@@ -213,65 +470,55 @@ def get_products():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 8, type=int)
     paginated_products = query.order_by(Product.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    products_list = [product.to_dict() for product in paginated_products.items]
-    return jsonify({
-        "products": products_list, "total_products": paginated_products.total,
+    # Compose the body from the per-product JSON instead of re-serializing every item
+    pagination_json = orjson.dumps({
+        "total_products": paginated_products.total,
         "current_page": paginated_products.page, "total_pages": paginated_products.pages,
         "has_next": paginated_products.has_next, "has_prev": paginated_products.has_prev
-    }), 200
+    })
+    body = b'{"products":[' + b','.join(serialized_product_summaries(paginated_products.items)) + b'],' + pagination_json[1:]
+    return Response(body, mimetype='application/json'), 200
 
 @product_bp.route('/products/<int:product_id>', methods=['GET'])
 def get_product_detail_route(product_id): # Renamed to avoid conflict
-    product = Product.query.get_or_404(product_id, description="Product not found")
+    product = db.get_or_404(Product, product_id, description="Product not found")
     return jsonify(product.to_dict()), 200
 
 @product_bp.route('/products/<int:product_id>', methods=['DELETE'])
 @jwt_required()
 def delete_product(product_id):
-    current_user_id_str = get_jwt_identity() 
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    product = Product.query.get_or_404(product_id, description="Product not found")
+    current_user_id_int = get_current_user_id()
+
+    product = db.get_or_404(Product, product_id, description="Product not found")
 
     if product.seller_id != current_user_id_int:
         current_app.logger.warning(f"Auth fail: Product seller ID {product.seller_id} != Current user ID {current_user_id_int}")
         return jsonify({"msg": "Not authorized to delete this product"}), 403
 
+    # Image filenames live in the product row's own column, so deleting the row is the only write for them
+    filenames_to_delete = [
+        filename for filename in product.image_filenames_list
+        if filename and not filename.startswith(('http://', 'https://')) # Only delete local files
+    ]
+
     try:
-        # Before deleting product, remove its images from filesystem
-        upload_folder = current_app.config.get('UPLOAD_FOLDER')
-        filenames_to_delete = product.image_filenames_list # Get filenames
-        
-        for filename in filenames_to_delete:
-            if filename and not filename.startswith(('http://', 'https://')): # Only delete local files
-                try:
-                    file_path = os.path.join(upload_folder, filename)
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        current_app.logger.info(f"Deleted image file: {filename}")
-                except Exception as e:
-                    current_app.logger.error(f"Error deleting image file {filename}: {str(e)}")
-        
         db.session.delete(product)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error deleting product {product_id} by user {current_user_id_int}: {str(e)}")
         return jsonify({"msg": "Failed to delete product due to a server error"}), 500
+
+    # Remove the images only after the commit, so a failed delete never leaves a product without its files;
+    # queued to the cleanup thread so the response only waits for the commit
+    remove_uploaded_files(filenames_to_delete, background=True)
         
     return jsonify({"msg": "Product deleted successfully"}), 200
 
 @product_bp.route('/my-listings', methods=['GET'])
 @jwt_required()
 def get_my_listings():
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
+    current_user_id_int = get_current_user_id()
+
     user_products = Product.query.filter_by(seller_id=current_user_id_int).order_by(Product.created_at.desc()).all()
     return jsonify({"products": [product.to_dict() for product in user_products]}), 200
@@ -1,10 +1,14 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app
 from app import db
-from app.models import Purchase, User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import Product, Purchase, PurchaseItem, User
+from app.auth_helpers import get_current_user_id
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload
 
 purchase_bp = Blueprint('purchase_bp', __name__)
 
+PURCHASE_HISTORY_MAX_PER_PAGE = 100 # Cap for clients that opt into pagination with ?per_page=
+
 @purchase_bp.route('/purchases', methods=['GET'])
 @jwt_required()
 def get_purchase_history():
@@ -12,21 +16,41 @@ def get_purchase_history():
     Gets the purchase history for the currently authenticated user.
     Requires authentication.
     Orders purchases by date, most recent first.
+    Returns the full history unless the client opts into pagination with ?per_page=
+    (at most PURCHASE_HISTORY_MAX_PER_PAGE) and optionally ?page=.
     """
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-        
-    user = User.query.get(current_user_id_int)
-    if not user: 
-        return jsonify({"msg":"Authenticated user not found"}), 404
-    
+    current_user_id_int = get_current_user_id()
+
+    per_page = request.args.get('per_page', type=int)
     try:
-        purchases_query = Purchase.query.filter_by(user_id=current_user_id_int).order_by(Purchase.purchase_date.desc()).all()
-        purchase_history_list = [purchase.to_dict() for purchase in purchases_query]
-        return jsonify(purchase_history_list), 200
+        # Items, their original products and those products' sellers are each loaded with one
+        # IN query for the whole result, instead of lazily per purchase/item
+        purchases_query = (
+            Purchase.query
+            .options(
+                selectinload(Purchase.items)
+                .selectinload(PurchaseItem.original_product)
+                .load_only(Product.description, Product.category, Product.seller_id, Product.created_at)
+                .selectinload(Product.seller)
+                .load_only(User.username)
+            )
+            .filter_by(user_id=current_user_id_int)
+            .order_by(Purchase.purchase_date.desc())
+        )
+        if per_page is None:
+            return jsonify([purchase.to_dict() for purchase in purchases_query.all()]), 200
+
+        purchases_page = purchases_query.paginate(
+            page=request.args.get('page', 1, type=int), per_page=per_page,
+            max_per_page=PURCHASE_HISTORY_MAX_PER_PAGE, error_out=False
+        )
+        purchase_history_list = [purchase.to_dict() for purchase in purchases_page.items]
+        # The body stays a plain array either way; pagination details go in headers
+        response = jsonify(purchase_history_list)
+        response.headers['X-Total-Count'] = str(purchases_page.total)
+        response.headers['X-Total-Pages'] = str(purchases_page.pages)
+        response.headers['X-Current-Page'] = str(purchases_page.page)
+        return response, 200
     except Exception as e:
         current_app.logger.error(f"Error fetching purchase history for user {current_user_id_int}: {str(e)}")
         return jsonify({"msg": "Failed to retrieve purchase history due to a server error"}), 500
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import db
-from app.models import User, Product # wishlist_items table is used via User.wishlist relationship
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import Product, wishlist_items
+from app.auth_helpers import current_user_exists, get_current_user_id
+from app.db_helpers import upsert_insert
+from flask_jwt_extended import jwt_required
+from sqlalchemy import literal, select
+from sqlalchemy.orm import selectinload
 
 wishlist_bp = Blueprint('wishlist_bp', __name__)
 
@@ -9,83 +13,94 @@ wishlist_bp = Blueprint('wishlist_bp', __name__)
 @jwt_required()
 def get_wishlist():
     """Gets the current user's wishlist."""
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
+    current_user_id_int = get_current_user_id()
 
-    user = User.query.get(current_user_id_int)
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-    
-    # user.wishlist directly gives a list of Product objects due to the model relationship
-    wishlist_products_data = [product.to_dict() for product in user.wishlist]
+    # Query the wishlisted products by user id directly (with their sellers) instead of loading the User
+    wishlist_products = db.session.scalars(
+        select(Product)
+        .join(wishlist_items, wishlist_items.c.product_id == Product.id)
+        .where(wishlist_items.c.user_id == current_user_id_int)
+        .options(selectinload(Product.seller))
+    ).all()
+    wishlist_products_data = [product.to_dict() for product in wishlist_products]
     return jsonify(wishlist_products_data), 200
 
+def wishlist_add_rejection(user_id, product_id):
+    """
+    Returns the 404/403/409 response explaining why `product_id` can't be added to the user's
+    wishlist, or None if it can. Only needs Product.seller_id and an EXISTS on wishlist_items.
+    """
+    seller_id = db.session.scalar(select(Product.seller_id).where(Product.id == product_id))
+    if seller_id is None:
+        return jsonify({"msg": "Product not found"}), 404
+    if seller_id == user_id:
+        return jsonify({"msg": "You cannot add your own product to your wishlist"}), 403
+    if db.session.query(db.exists().where(
+        wishlist_items.c.user_id == user_id, wishlist_items.c.product_id == product_id
+    )).scalar():
+        return jsonify({"msg": "Product already in wishlist"}), 409 # Conflict
+    return None
+
 @wishlist_bp.route('/wishlist/<int:product_id>', methods=['POST'])
 @jwt_required()
 def add_to_wishlist(product_id):
     """Adds a product to the current user's wishlist."""
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
-
-    user = User.query.get(current_user_id_int)
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
+    current_user_id_int = get_current_user_id()
+    if not current_user_exists():
+        return jsonify({"msg": "Authenticated user not found"}), 404
 
-    product = Product.query.get(product_id)
-    if not product:
-        return jsonify({"msg": "Product not found"}), 404
-
-    if product in user.wishlist:
-        return jsonify({"msg": "Product already in wishlist"}), 409 # Conflict
-
-    if product.seller_id == current_user_id_int:
-        return jsonify({"msg": "You cannot add your own product to your wishlist"}), 403
-
-    user.wishlist.append(product)
+    insert_stmt = upsert_insert(wishlist_items)
     try:
-        db.session.commit()
+        if insert_stmt is not None:
+            # One INSERT ... SELECT ... ON CONFLICT DO NOTHING: the SELECT only yields a row if the product
+            # exists and isn't the user's own, and the (user_id, product_id) primary key absorbs duplicates
+            insertable_product = select(literal(current_user_id_int), Product.id).where(
+                Product.id == product_id, Product.seller_id != current_user_id_int
+            )
+            inserted = db.session.execute(
+                insert_stmt.from_select(['user_id', 'product_id'], insertable_product)
+                .on_conflict_do_nothing(index_elements=['user_id', 'product_id'])
+            ).rowcount
+        else:
+            # Dialects without ON CONFLICT fall back to checking first
+            rejection = wishlist_add_rejection(current_user_id_int, product_id)
+            if rejection:
+                return rejection
+            db.session.execute(wishlist_items.insert().values(user_id=current_user_id_int, product_id=product_id))
+            inserted = 1
+        if inserted:
+            db.session.commit()
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error adding to wishlist for user {current_user_id_int}, product {product_id}: {str(e)}")
         return jsonify({"msg": "Could not add product to wishlist due to a server error"}), 500
+
+    if not inserted:
+        # Nothing was inserted; only this path pays for finding out why
+        return wishlist_add_rejection(current_user_id_int, product_id) or (
+            jsonify({"msg": "Product already in wishlist"}), 409
+        )
         
-    return jsonify({"msg": "Product added to wishlist", "productId": product.id}), 201
+    return jsonify({"msg": "Product added to wishlist", "productId": product_id}), 201
 
 @wishlist_bp.route('/wishlist/<int:product_id>', methods=['DELETE'])
 @jwt_required()
 def remove_from_wishlist(product_id):
     """Removes a product from the current user's wishlist."""
-    current_user_id_str = get_jwt_identity()
-    try:
-        current_user_id_int = int(current_user_id_str)
-    except ValueError:
-        return jsonify({"msg": "Invalid user identity in token"}), 401
+    current_user_id_int = get_current_user_id()
         
-    user = User.query.get(current_user_id_int)
-    if not user:
-        return jsonify({"msg": "User not found"}), 404
-
-    product = Product.query.get(product_id)
-    if not product:
-        # If product doesn't exist, it can't be in the wishlist.
-        # Depending on desired behavior, could be 404 or just a success if item isn't there.
-        return jsonify({"msg": "Product not found, so it cannot be in wishlist"}), 404
-
-    if product not in user.wishlist:
-        return jsonify({"msg": "Product not in wishlist"}), 404 # Item not found in this specific list
-
+    # A single DELETE on the association row; no matching row means it wasn't in the wishlist
+    # (including products that don't exist)
     try:
-        user.wishlist.remove(product)
+        result = db.session.execute(wishlist_items.delete().where(
+            wishlist_items.c.user_id == current_user_id_int, wishlist_items.c.product_id == product_id
+        ))
+        if result.rowcount == 0:
+            return jsonify({"msg": "Product not in wishlist"}), 404 # Item not found in this specific list
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error removing from wishlist for user {current_user_id_int}, product {product_id}: {str(e)}")
         return jsonify({"msg": "Could not remove product from wishlist due to a server error"}), 500
         
-    return jsonify({"msg": "Product removed from wishlist", "productId": product.id}), 200
+    return jsonify({"msg": "Product removed from wishlist", "productId": product_id}), 200
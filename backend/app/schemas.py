@@ -0,0 +1,57 @@
+import fastjsonschema
+from flask import jsonify
+
+# JSON request-body schemas, compiled once at import time into plain Python validators
+
+validate_register_body = fastjsonschema.compile({
+    "type": "object",
+    "required": ["email", "username", "password"],
+    "properties": {
+        "email": {"type": "string", "format": "email"},
+        "username": {"type": "string", "minLength": 1},
+        "password": {"type": "string", "minLength": 6},
+        "profileImage": {"type": ["string", "null"]}
+    }
+})
+
+validate_login_body = fastjsonschema.compile({
+    "type": "object",
+    "required": ["email", "password"],
+    "properties": {
+        "email": {"type": "string", "minLength": 1},
+        "password": {"type": "string", "minLength": 1}
+    }
+})
+
+validate_profile_body = fastjsonschema.compile({
+    "type": "object",
+    "properties": {
+        "username": {"type": "string", "pattern": "\\S"}, # Not empty or whitespace-only
+        "profileImage": {"type": ["string", "null"]}
+    }
+})
+
+validate_cart_add_body = fastjsonschema.compile({
+    "type": "object",
+    "required": ["productId"],
+    "properties": {
+        "productId": {"type": "integer"},
+        "quantity": {"type": "integer", "minimum": 1}
+    }
+})
+
+validate_cart_update_body = fastjsonschema.compile({
+    "type": "object",
+    "required": ["quantity"],
+    "properties": {
+        "quantity": {"type": "integer"} # Values below 1 remove the item
+    }
+})
+
+def schema_error_response(validator, data):
+    """Returns a 400 response describing why `data` fails `validator`, or None if it is valid."""
+    try:
+        validator(data)
+    except fastjsonschema.JsonSchemaException as e:
+        return jsonify({"msg": f"Invalid request body: {e.message}"}), 400
+    return None
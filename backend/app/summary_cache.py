@@ -0,0 +1,35 @@
+from collections import OrderedDict
+from threading import Lock
+
+class SerializedSummaryCache:
+    """
+    Per-process, thread-safe LRU of already-serialized (orjson bytes) product summaries.
+    Keys must capture everything the summary depends on, e.g.
+    (product id, product.updated_at, seller username, request URL root),
+    so a changed row simply stops being hit and ages out.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get_many(self, keys):
+        """Returns {key: bytes} for the keys that are cached, marking them as recently used."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        return found
+
+    def set_many(self, items):
+        """Stores {key: bytes}, evicting the least recently used entries beyond maxsize."""
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -24,10 +24,28 @@ class Config:
     # Defaults to an SQLite database in the instance folder
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///../instance/ecofinds.sqlite'
     SQLALCHEMY_TRACK_MODIFICATIONS = False # Disable modification tracking to save resources
+    # pool_pre_ping discards connections the server dropped; pool_recycle bounds connection age.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+    }
+    # Connection pool sizing so concurrent requests don't queue on the default 5-connection pool.
+    # create_app applies it for non-SQLite databases only (in-memory SQLite's StaticPool rejects it).
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 20))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
 
     # Secret key for JWT (JSON Web Tokens)
     # IMPORTANT: Change this in your production environment!
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your_jwt_secret_key_please_change_me'
+    # bcrypt cost factor used by Flask-Bcrypt (each +1 doubles hashing time).
+    # Run `flask bench-bcrypt` on the target hardware to pick a value.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', '10'))
+    # Worker processes used for password hashing so it doesn't block request threads
+    # (0, the default, hashes inline in the request thread). Every app process gets its own
+    # pool, so under gunicorn keep workers * BCRYPT_POOL_WORKERS around the CPU count,
+    # e.g. 1-2 per gunicorn worker.
+    BCRYPT_POOL_WORKERS = int(os.environ.get('BCRYPT_POOL_WORKERS', '0'))
+
     # Optional: Configure token expiration times
     # from datetime import timedelta
     # JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -43,7 +61,22 @@ class Config:
     # URL path from which uploaded files will be served
     FLASK_STATIC_UPLOADS_URL = os.environ.get('FLASK_STATIC_UPLOADS_URL') or '/uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'} # Allowed image extensions
+    # Browser cache lifetime (seconds) for uploaded files; names are random and never reused,
+    # so the files are effectively immutable.
+    UPLOADS_MAX_AGE = int(os.environ.get('UPLOADS_MAX_AGE', 31536000))
+    # Hand uploaded-file bodies to the front-end web server instead of streaming them from Python.
+    # USE_X_SENDFILE (Apache/lighttpd) is Flask's built-in X-Sendfile support.
+    # UPLOADS_X_ACCEL_REDIRECT_PREFIX (nginx) is the `internal` location aliased to UPLOAD_FOLDER,
+    # e.g. "/protected_uploads".
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() in ('1', 'true', 'yes')
+    UPLOADS_X_ACCEL_REDIRECT_PREFIX = os.environ.get('UPLOADS_X_ACCEL_REDIRECT_PREFIX')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Example: 16MB max upload size
+    # Limits on multipart form parsing (also honored by the streaming product form parser)
+    MAX_FORM_MEMORY_SIZE = 500 * 1024  # Max bytes of a single non-file field
+    MAX_FORM_PARTS = 50  # Max number of file parts in one body
+    MAX_IMAGE_FILE_SIZE = 10 * 1024 * 1024  # Max bytes of a single uploaded image
+    # Serialized product summaries kept per process for GET /products (0 disables the cache)
+    PRODUCT_SUMMARY_CACHE_SIZE = int(os.environ.get('PRODUCT_SUMMARY_CACHE_SIZE', 2048))
 
     # CORS configuration (Cross-Origin Resource Sharing)
     # For development, '*' allows all origins. Restrict this in production.
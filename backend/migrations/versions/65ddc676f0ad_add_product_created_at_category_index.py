@@ -0,0 +1,26 @@
+"""Add product created_at category index
+
+Revision ID: 65ddc676f0ad
+Revises: 79e53ed23389
+Create Date: 2026-10-14 18:52:48.633284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '65ddc676f0ad'
+down_revision = '79e53ed23389'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_created_at_category', ['created_at', 'category'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_created_at_category')
@@ -100,8 +100,12 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
     setIsLoading(true);
     const response = await api.addToCart(product.id, quantity); // product.id is number
     setIsLoading(false);
-    if (response && (response as CartItem).productId && !response.error) {
-      await fetchCart(); // Refetch cart
+    if (response && response.item && !response.error) {
+      const addedItem = response.item as CartItem;
+      // Patch local state with the affected item instead of refetching the whole cart
+      setCartItems(prev => prev.some(item => item.productId === addedItem.productId)
+        ? prev.map(item => item.productId === addedItem.productId ? addedItem : item)
+        : [...prev, addedItem]);
       toast({ title: "Added to cart", description: `${product.title} added to your cart.` });
     } else {
       const errorMessage = formatErrorMessage(response?.error, "Could not add to cart.");
@@ -114,8 +118,8 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
     setIsLoading(true);
     const response = await api.removeFromCart(productId);
     setIsLoading(false);
-    if (response && response.cart && !response.error) {
-      setCartItems(response.cart);
+    if (response && !response.error) {
+      setCartItems(prev => prev.filter(item => item.productId !== productId));
       toast({ title: "Removed from cart", description: "Item removed from your cart." });
     } else {
       const errorMessage = formatErrorMessage(response?.error, "Could not remove from cart.");
@@ -129,8 +133,9 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
     setIsLoading(true);
     const response = await api.updateCartItem(productId, quantity);
     setIsLoading(false);
-    if (response && response.cart && !response.error) {
-      setCartItems(response.cart);
+    if (response && response.item && !response.error) {
+      const updatedItem = response.item as CartItem;
+      setCartItems(prev => prev.map(item => item.productId === productId ? updatedItem : item));
     } else {
       const errorMessage = formatErrorMessage(response?.error, "Could not update quantity.");
       toast({ title: "Error Updating Quantity", description: errorMessage, variant: "destructive" });
@@ -109,7 +109,9 @@ export function ProductProvider({ children }: { children: React.ReactNode }) {
 
   const getProductById = async (id: string): Promise<Product | undefined> => {
     const productIdNumber = Number(id);
-    const localProduct = products.find(p => p.id === productIdNumber) || userProducts.find(p => p.id === productIdNumber);
+    // Only "My Listings" entries are complete; the general list holds summaries (truncated description,
+    // thumbnail image only), so those products are fetched in full
+    const localProduct = userProducts.find(p => p.id === productIdNumber);
     if (localProduct) return localProduct;
     setIsLoading(true);
     const response = await api.getProductById(id);
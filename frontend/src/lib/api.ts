@@ -9,7 +9,7 @@ interface ApiErrorResponse {
   error?: string;
 }
 
-type ApiResponse<T = any> = T | { error: string; msg?: string } | PaginatedProductsResponse | { products: Product[] } | { cart: CartItem[] } | { item: CartItem, cart: CartItem[] } | { purchaseId: string; purchaseDetails: Purchase } | { message: string } ;
+type ApiResponse<T = any> = T | { error: string; msg?: string } | PaginatedProductsResponse | { products: Product[] } | { item: CartItem | null } | { purchaseId: string; purchaseDetails: Purchase } | { message: string } ;
 
 
 const getToken = (): string | null => localStorage.getItem('accessToken');
@@ -154,11 +154,11 @@ export const api = {
   // Cart
   getCart: () => request<CartItem[]>('/cart', 'GET'),
   addToCart: (productId: number, quantity: number = 1) => // productId is number
-    request<CartItem>('/cart', 'POST', { productId, quantity }),
+    request<{msg: string, item: CartItem}>('/cart', 'POST', { productId, quantity }),
   updateCartItem: (productId: number, quantity: number) => // productId is number
-    request<{item: CartItem, cart: CartItem[]}>(`/cart/item/${productId}`, 'PUT', { quantity }),
+    request<{msg: string, item: CartItem | null}>(`/cart/item/${productId}`, 'PUT', { quantity }),
   removeFromCart: (productId: number) => // productId is number
-    request<{msg: string, cart: CartItem[] }>(`/cart/item/${productId}`, 'DELETE'),
+    request<{msg: string, productId: number }>(`/cart/item/${productId}`, 'DELETE'),
   checkout: () => request<{ purchaseId: number; purchaseDetails: Purchase }>(`/cart/checkout`, 'POST'),
 
   // Purchases